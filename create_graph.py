@@ -1,9 +1,15 @@
 import numpy as np
 import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
 from collections import defaultdict
+from itertools import islice
 import time
 
-def create_elevation_graph(elevation_array, max_size=None):
+# SRTM no-data marker
+NODATA = -32768
+
+def create_elevation_graph(elevation_array, max_size=None, verbose=True):
     """
     Create a graph from elevation data where each cell is a node
     and edges connect to 4-neighbors (no diagonal connections, no wrap-around)
@@ -11,11 +17,13 @@ def create_elevation_graph(elevation_array, max_size=None):
     Args:
         elevation_array: 2D numpy array of elevation values
         max_size: Optional tuple (max_rows, max_cols) to limit graph size for testing
+        verbose: Print progress messages while building
     
     Returns:
         NetworkX Graph object
     """
-    print("Creating graph from elevation data...")
+    if verbose:
+        print("Creating graph from elevation data...")
     
     # Get array dimensions
     rows, cols = elevation_array.shape
@@ -25,73 +33,326 @@ def create_elevation_graph(elevation_array, max_size=None):
         rows = min(rows, max_size[0])
         cols = min(cols, max_size[1])
         elevation_array = elevation_array[:rows, :cols]
-        print(f"Limited to {rows}x{cols} for testing")
+        if verbose:
+            print(f"Limited to {rows}x{cols} for testing")
     
-    print(f"Processing {rows}x{cols} = {rows*cols:,} nodes")
+    # Copy just the cells we use into one contiguous block; for a memory-mapped
+    # input this is where the touched pages are read, once
+    elevation_array = np.ascontiguousarray(elevation_array)
     
-    # Create graph
-    G = nx.Graph()
-    
-    # Add nodes with elevation data
-    print("Adding nodes...")
-    for i in range(rows):
-        for j in range(cols):
-            node_id = i * cols + j  # Convert 2D coordinates to 1D node ID
-            elevation = elevation_array[i, j]
-            G.add_node(node_id, 
-                      row=i, 
-                      col=j, 
-                      elevation=elevation,
-                      pos=(j, -i))  # Position for visualization (j=x, -i=y for proper orientation)
+    if verbose:
+        print(f"Processing {rows}x{cols} = {rows*cols:,} nodes")
+    
+    # Create graph; the grid dimensions are all that's needed to map node IDs
+    # back to cells, so nodes carry no per-node attributes
+    G = nx.Graph(rows=rows, cols=cols)
+    
+    # Add nodes (node_id = i * cols + j, see node_rc / node_elev).
+    # The node and adjacency dicts are filled by one comprehension each
+    # rather than add_nodes_from, which grows them one insert at a time
+    # with per-node checks; this is safe on a freshly created graph.
+    if verbose:
+        print("Adding nodes...")
+    G._node = {node: {} for node in range(rows * cols)}
+    G._adj = {node: {} for node in range(rows * cols)}
     
     # Add edges to 4-connected neighbors
-    print("Adding edges...")
-    edge_count = 0
-    
-    # Directions: up, down, left, right
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    
-    for i in range(rows):
-        for j in range(cols):
-            current_node = i * cols + j
-            current_elevation = elevation_array[i, j]
-            
-            # Check each of the 4 neighbors
-            for di, dj in directions:
-                ni, nj = i + di, j + dj
-                
-                # Check bounds (no wrap-around)
-                if 0 <= ni < rows and 0 <= nj < cols:
-                    neighbor_node = ni * cols + nj
-                    neighbor_elevation = elevation_array[ni, nj]
-                    
-                    # Add edge if it doesn't exist (undirected graph)
-                    if not G.has_edge(current_node, neighbor_node):
-                        # Calculate elevation difference
-                        elevation_diff = abs(current_elevation - neighbor_elevation)
-                        
-                        G.add_edge(current_node, neighbor_node,
-                                 weight=elevation_diff,
-                                 distance=1)  # Each cell is 1 unit apart
-                        edge_count += 1
-    
-    print(f"Graph created with {G.number_of_nodes():,} nodes and {G.number_of_edges():,} edges")
+    if verbose:
+        print("Adding edges...")
+    
+    # Node IDs laid out on the grid, so neighbor pairs are plain array slices
+    ids = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    
+    # Integer elevations are widened to at least int32 inside the
+    # subtraction so it can't overflow; float input is left as is
+    wide = np.promote_types(elevation_array.dtype, np.int32)
+    
+    # Cells holding the no-data value get no edges, so they can't act as
+    # ~65 km cliffs in pathfinding
+    valid = elevation_array != NODATA
+    
+    # Horizontal edges: (i, j) -- (i, j+1)
+    keep_h = (valid[:, :-1] & valid[:, 1:]).ravel()
+    u_h = ids[:, :-1].ravel()[keep_h]
+    v_h = ids[:, 1:].ravel()[keep_h]
+    w_h = np.abs(np.subtract(elevation_array[:, :-1], elevation_array[:, 1:], dtype=wide)).astype(np.float32).ravel()[keep_h]
+    
+    # Vertical edges: (i, j) -- (i+1, j)
+    keep_v = (valid[:-1, :] & valid[1:, :]).ravel()
+    u_v = ids[:-1, :].ravel()[keep_v]
+    v_v = ids[1:, :].ravel()[keep_v]
+    w_v = np.abs(np.subtract(elevation_array[:-1, :], elevation_array[1:, :], dtype=wide)).astype(np.float32).ravel()[keep_v]
+    
+    u = np.concatenate([u_h, u_v])
+    v = np.concatenate([v_h, v_v])
+    w = np.concatenate([w_h, w_v])
+    
+    # Each edge is emitted exactly once, so no duplicate check is needed.
+    # tolist() converts the arrays to Python scalars in C, instead of boxing
+    # one NumPy scalar at a time while zip() walks the arrays.
+    G.add_weighted_edges_from(zip(u.tolist(), v.tolist(), w.tolist()),
+                              distance=1)  # Each cell is 1 unit apart
+    
+    if verbose:
+        print(f"Graph created with {G.number_of_nodes():,} nodes and {G.number_of_edges():,} edges")
     return G
 
-def analyze_graph(G):
+def hilbert_index(i, j, order):
+    """
+    Position of grid cells (i, j) along a Hilbert curve over a 2**order square
+    
+    Works element-wise on integer arrays using the standard bit-by-bit
+    rotate/flip construction.
+    """
+    n = 1 << order
+    x = np.asarray(j, dtype=np.int64).copy()
+    y = np.asarray(i, dtype=np.int64).copy()
+    d = np.zeros(np.broadcast(x, y).shape, dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the sub-curve has the canonical orientation
+        flip = rx & ~ry
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return d
+
+def hilbert_node_ids(rows, cols):
+    """
+    Node ID of every grid cell, numbered 0..N-1 in Hilbert-curve order
+    
+    Unlike row-major IDs, where vertical neighbors are a full row apart,
+    cells that are close on the grid get close IDs, so their CSR rows and
+    per-node arrays (distances, predecessors) share cache lines.
+    
+    Returns:
+        int32 array of shape (rows, cols) for build_csr_grid(node_ids=...)
+    """
+    order = (max(rows, cols) - 1).bit_length()
+    i, j = np.indices((rows, cols))
+    d = hilbert_index(i, j, order).ravel()
+    
+    # Rank the curve positions so IDs stay dense on non-square / non-2**k grids
+    ids = np.empty(rows * cols, dtype=np.int32)
+    ids[np.argsort(d, kind='stable')] = np.arange(rows * cols, dtype=np.int32)
+    return ids.reshape(rows, cols)
+
+def _grid_masks(elevation):
+    """
+    Per-direction neighbor masks for every grid cell
+    
+    Directions are up, left, right, down, which keeps every CSR row's
+    column indices sorted for row-major node IDs. A cell pair is only
+    connected when both elevations are valid (not NODATA).
+    
+    Returns:
+        bool[4, R, C] array
+    """
+    rows, cols = elevation.shape
+    valid = elevation != NODATA
+    ok_v = valid[1:, :] & valid[:-1, :]
+    ok_h = valid[:, 1:] & valid[:, :-1]
+    
+    has = np.zeros((4, rows, cols), dtype=bool)
+    has[0, 1:, :] = ok_v
+    has[1, :, 1:] = ok_h
+    has[2, :, :-1] = ok_h
+    has[3, :-1, :] = ok_v
+    return has
+
+def _grid_neighbors(elevation):
+    """
+    Per-direction neighbor masks (see _grid_masks) and edge weights
+    
+    Returns:
+        Tuple (has, w) of bool[4, R, C] and float32[4, R, C]
+    """
+    rows, cols = elevation.shape
+    # Widen integer elevations to at least int32 so differences can't
+    # overflow; float input is left as is
+    wide = np.promote_types(elevation.dtype, np.int32)
+    
+    has = _grid_masks(elevation)
+    w = np.zeros((4, rows, cols), dtype=np.float32)
+    diff_v = np.abs(np.subtract(elevation[1:, :], elevation[:-1, :], dtype=wide))
+    diff_h = np.abs(np.subtract(elevation[:, 1:], elevation[:, :-1], dtype=wide))
+    w[0, 1:, :] = diff_v
+    w[1, :, 1:] = diff_h
+    w[2, :, :-1] = diff_h
+    w[3, :-1, :] = diff_v
+    return has, w
+
+def build_csr_grid(elevation, node_ids=None):
+    """
+    Build the 4-connected elevation grid directly in CSR form
+    
+    By default node IDs follow the same row-major layout as
+    create_elevation_graph (node_id = i * cols + j). Every undirected edge
+    appears once in each endpoint's row, so the arrays can be handed
+    straight to scipy.sparse.csr_matrix / scipy.sparse.csgraph.
+    
+    Args:
+        elevation: 2D numpy array of elevation values
+        node_ids: Optional int array with the same shape as elevation giving
+                  each cell's node ID (a permutation of 0..N-1), e.g.
+                  hilbert_node_ids(rows, cols)
+    
+    Returns:
+        Tuple (indptr, indices, weights) of int64[N+1], int32[2E], float32[2E]
+    """
+    rows, cols = elevation.shape
+    if node_ids is None:
+        node_ids = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    has, w = _grid_neighbors(elevation)
+    shifts = ((-1, 0), (0, -1), (0, 1), (1, 0))
+    
+    # Row pointers from per-node degree (4 inside, 3 on edges, 2 in corners,
+    # fewer next to no-data cells), laid out in node ID order
+    deg = np.empty(rows * cols, dtype=np.int32)
+    deg[node_ids.ravel()] = has.sum(axis=0).ravel()
+    # indptr is int64: large grids can exceed 2**31 CSR entries
+    indptr = np.zeros(rows * cols + 1, dtype=np.int64)
+    np.cumsum(deg, out=indptr[1:])
+    
+    # Pad the ID grid by one cell so each neighbor ID grid is a plain slice
+    padded = np.full((rows + 2, cols + 2), -1, dtype=np.int32)
+    padded[1:-1, 1:-1] = node_ids
+    
+    # Scatter one direction at a time into each node's next free slot
+    slot = indptr[node_ids]
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    weights = np.empty(indptr[-1], dtype=np.float32)
+    for k, (di, dj) in enumerate(shifts):
+        mask = has[k]
+        neighbor = padded[1 + di:rows + 1 + di, 1 + dj:cols + 1 + dj]
+        indices[slot[mask]] = neighbor[mask]
+        weights[slot[mask]] = w[k][mask]
+        slot += mask
+    
+    return indptr, indices, weights
+
+def _row_tiles(rows, tile_rows):
+    """Yield (top, bottom, lo, hi): tile rows and tile rows plus halo rows"""
+    for top in range(0, rows, tile_rows):
+        bottom = min(top + tile_rows, rows)
+        yield top, bottom, max(top - 1, 0), min(bottom + 1, rows)
+
+def build_csr_tiled(elev_mmap, tile_rows=1024, out_prefix="elevation_graph"):
+    """
+    Build the row-major CSR grid in horizontal tiles, writing to disk
+    
+    Only one tile of tile_rows rows (plus a halo row above and below for
+    the vertical edges crossing tile boundaries) is in memory at a time;
+    the CSR arrays are written into memory-mapped .npy files. A first pass
+    over the tiles counts degrees to size the files exactly, a second
+    fills them. Produces the same arrays as build_csr_grid(elevation) for
+    grids too large to build in RAM.
+    
+    Args:
+        elev_mmap: 2D (typically memory-mapped) array of elevation values
+        tile_rows: Number of grid rows processed per tile
+        out_prefix: Output files are <out_prefix>_indptr.npy,
+                    <out_prefix>_indices.npy and <out_prefix>_weights.npy
+    
+    Returns:
+        Tuple (indptr, indices, weights) of memory-mapped int64[N+1],
+        int32[2E], float32[2E] arrays
+    """
+    rows, cols = elev_mmap.shape
+    num_nodes = rows * cols
+    
+    # indptr is int64: full mosaics can exceed 2**31 CSR entries
+    indptr = np.lib.format.open_memmap(f"{out_prefix}_indptr.npy", mode='w+',
+                                       dtype=np.int64, shape=(num_nodes + 1,))
+    indptr[0] = 0
+    
+    # First pass: row pointers. Read each tile with one halo row on each
+    # side, then keep only the tile's own cells; the halo rows just supply
+    # their neighbors. Row pointers continue from where the last tile ended
+    for top, bottom, lo, hi in _row_tiles(rows, tile_rows):
+        has = _grid_masks(np.asarray(elev_mmap[lo:hi]))[:, top - lo:bottom - lo]
+        deg = has.sum(axis=0).ravel()
+        indptr[top * cols + 1:bottom * cols + 1] = indptr[top * cols] + np.cumsum(deg, dtype=np.int64)
+    
+    num_entries = int(indptr[-1])
+    indices = np.lib.format.open_memmap(f"{out_prefix}_indices.npy", mode='w+',
+                                        dtype=np.int32, shape=(num_entries,))
+    weights = np.lib.format.open_memmap(f"{out_prefix}_weights.npy", mode='w+',
+                                        dtype=np.float32, shape=(num_entries,))
+    offsets = (-cols, -1, 1, cols)
+    
+    # Second pass: scatter one direction at a time, as in build_csr_grid
+    for top, bottom, lo, hi in _row_tiles(rows, tile_rows):
+        has, w = _grid_neighbors(np.asarray(elev_mmap[lo:hi]))
+        has = has[:, top - lo:bottom - lo]
+        w = w[:, top - lo:bottom - lo]
+        
+        start = int(indptr[top * cols])
+        end = int(indptr[bottom * cols])
+        ids = np.arange(top * cols, bottom * cols, dtype=np.int32).reshape(-1, cols)
+        slot = (indptr[top * cols:bottom * cols] - start).reshape(-1, cols)
+        tile_indices = np.empty(end - start, dtype=np.int32)
+        tile_weights = np.empty(end - start, dtype=np.float32)
+        for k, offset in enumerate(offsets):
+            mask = has[k]
+            tile_indices[slot[mask]] = ids[mask] + offset
+            tile_weights[slot[mask]] = w[k][mask]
+            slot += mask
+        
+        indices[start:end] = tile_indices
+        weights[start:end] = tile_weights
+    
+    indptr.flush()
+    indices.flush()
+    weights.flush()
+    return indptr, indices, weights
+
+def node_rc(node_id, cols):
+    """Return the (row, col) grid cell of a row-major node ID"""
+    return divmod(node_id, cols)
+
+def node_elev(node_id, elev, cols):
+    """Return the elevation of a row-major node ID"""
+    r, c = divmod(node_id, cols)
+    return elev[r, c]
+
+def analyze_graph(G, elevation_array):
     """Analyze basic properties of the graph"""
+    rows, cols = G.graph['rows'], G.graph['cols']
+    elevation_array = elevation_array[:rows, :cols]
+    
+    # A full R x C 4-grid has exactly 2RC - R - C edges and is connected,
+    # so only grids with no-data holes need to be traversed
+    mask = elevation_array != NODATA
+    has_nodata = not mask.all()
+    num_nodes = elevation_array.size
+    if has_nodata:
+        num_edges = G.number_of_edges()
+    else:
+        num_edges = 2 * num_nodes - rows - cols
+    
     print("\n=== Graph Analysis ===")
-    print(f"Nodes: {G.number_of_nodes():,}")
-    print(f"Edges: {G.number_of_edges():,}")
-    print(f"Average degree: {sum(dict(G.degree()).values()) / G.number_of_nodes():.2f}")
+    print(f"Nodes: {num_nodes:,}")
+    print(f"Edges: {num_edges:,}")
+    print(f"Average degree: {2 * num_edges / num_nodes:.2f}")
     
-    # Get elevation statistics
-    elevations = [G.nodes[node]['elevation'] for node in G.nodes()]
-    print(f"Elevation range: {min(elevations)} to {max(elevations)} meters")
+    # Get elevation statistics straight from the array the graph was built
+    # from, over valid cells only; no-data cells are isolated nodes
+    if mask.any():
+        emin = elevation_array.min(where=mask, initial=32767)
+        emax = elevation_array.max(where=mask, initial=-32767)
+        print(f"Elevation range: {emin} to {emax} meters")
+    else:
+        print("Elevation range: no valid elevations")
     
     # Check connectivity
-    print(f"Is connected: {nx.is_connected(G)}")
-    if not nx.is_connected(G):
+    is_connected = nx.is_connected(G) if has_nodata else True
+    print(f"Is connected: {is_connected}")
+    if not is_connected:
         components = list(nx.connected_components(G))
         print(f"Number of connected components: {len(components)}")
         print(f"Largest component size: {len(max(components, key=len))}")
@@ -100,45 +361,111 @@ def save_graph_sample(G, sample_size=100):
     """Save a small sample of the graph for visualization"""
     print(f"\nSaving sample of {sample_size} nodes for visualization...")
     
-    # Get a random sample of nodes
-    sample_nodes = list(G.nodes())[:sample_size]
-    subgraph = G.subgraph(sample_nodes)
+    # Get a sample of nodes; islice stops after sample_size instead of
+    # listing every node first
+    sample_nodes = list(islice(G.nodes(), sample_size))
+    
+    # Copy so the positions below land on the sample only, not on G's nodes
+    subgraph = G.subgraph(sample_nodes).copy()
+    
+    # Position for visualization (j=x, -i=y for proper orientation), computed
+    # for the sampled nodes only. Stored as scalar x / y attributes since
+    # GraphML can't hold tuples
+    cols = G.graph['cols']
+    nx.set_node_attributes(subgraph, {n: n % cols for n in sample_nodes}, 'x')
+    nx.set_node_attributes(subgraph, {n: -(n // cols) for n in sample_nodes}, 'y')
     
     # Save as GraphML for easy loading in other tools
     nx.write_graphml(subgraph, "elevation_graph_sample.graphml")
     print("Sample saved as: elevation_graph_sample.graphml")
 
+def save_csr_graph(path, indptr, indices, weights, shape):
+    """
+    Save CSR grid arrays (see build_csr_grid) as a compressed .npz file
+    
+    Args:
+        path: Output file path
+        indptr, indices, weights: CSR arrays of the graph
+        shape: (rows, cols) of the elevation grid the graph was built from
+    """
+    np.savez_compressed(path, indptr=indptr, indices=indices,
+                        weights=weights, shape=np.array(shape))
+
+def load_csr_graph(path):
+    """
+    Load a graph saved by save_csr_graph
+    
+    Returns:
+        Tuple (scipy.sparse.csr_matrix, (rows, cols))
+    """
+    with np.load(path) as d:
+        rows, cols = d['shape']
+        n = int(rows) * int(cols)
+        csr = csr_matrix((d['weights'], d['indices'], d['indptr']), shape=(n, n))
+    return csr, (int(rows), int(cols))
+
+def find_path(csr, source, target):
+    """
+    Find the path of least total elevation change between two nodes
+    
+    Runs SciPy's compiled Dijkstra over the CSR graph rather than
+    NetworkX's pure-Python implementation.
+    
+    Args:
+        csr: scipy.sparse.csr_matrix from build_csr_grid / load_csr_graph
+        source: Start node ID
+        target: End node ID
+    
+    Returns:
+        Tuple (cost, path) where path is the list of node IDs from source
+        to target, or (inf, []) if target is unreachable
+    """
+    dist, pred = dijkstra(csr, indices=source, return_predecessors=True)
+    if np.isinf(dist[target]):
+        return float(dist[target]), []
+    
+    path = [target]
+    while path[-1] != source:
+        path.append(int(pred[path[-1]]))
+    path.reverse()
+    return float(dist[target]), path
+
 if __name__ == "__main__":
     # Load elevation data
     print("Loading elevation data...")
-    elevation = np.load('elevation_data.npy')
+    # Memory-map so only the pages of the cells actually used are read
+    elevation = np.load('elevation_data.npy', mmap_mode='r')
     
     # For testing, let's start with a smaller portion
     # Remove this line to process the full array (warning: will be very large!)
     test_size = (100, 100)  # 10,000 nodes, ~20,000 edges
     
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
     
     # Create graph
     G = create_elevation_graph(elevation, max_size=test_size)
     
     # Analyze the graph
-    analyze_graph(G)
+    analyze_graph(G, elevation)
     
     # Save sample for visualization
     save_graph_sample(G, sample_size=min(100, G.number_of_nodes()))
     
-    # Save full graph (for small test sizes)
-    if G.number_of_nodes() <= 10000:
-        print("\nSaving full graph...")
-        nx.write_gpickle(G, "elevation_graph.pkl")
-        print("Full graph saved as: elevation_graph.pkl")
+    # Save full graph as CSR arrays, a few bytes per edge
+    print("\nSaving full graph...")
+    rows, cols = G.graph['rows'], G.graph['cols']
+    indptr, indices, weights = build_csr_grid(np.ascontiguousarray(elevation[:rows, :cols]))
+    save_csr_graph("elevation_graph.npz", indptr, indices, weights, (rows, cols))
+    print("Full graph saved as: elevation_graph.npz")
+    csr = csr_matrix((weights, indices, indptr), shape=(rows * cols, rows * cols))
     
-    elapsed = time.time() - start_time
-    print(f"\nTotal processing time: {elapsed:.2f} seconds")
+    elapsed_ms = (time.perf_counter_ns() - start_time) / 1e6
+    print(f"\nTotal processing time: {elapsed_ms:.1f} ms")
     
-    print(f"\nGraph object 'G' is ready to use!")
+    print(f"\nGraph object 'G' and CSR matrix 'csr' are ready to use!")
     print("Example usage:")
-    print("  - G.nodes[0] to see node 0 attributes")
+    print("  - node_rc(node, G.graph['cols']) to get a node's (row, col)")
+    print("  - node_elev(node, elevation, G.graph['cols']) to get a node's elevation")
     print("  - G.edges(data=True) to see edges with weights")
-    print("  - nx.shortest_path(G, source, target) for pathfinding")
\ No newline at end of file
+    print("  - find_path(csr, source, target) for pathfinding")
+    print("  - dijkstra(csr, indices=source, return_predecessors=True) for all distances from a node")
\ No newline at end of file
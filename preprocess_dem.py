@@ -5,40 +5,59 @@ from rasterio.transform import from_origin
 import matplotlib.pyplot as plt
 
 def preprocess_dem(input_file, output_file):
-    # Open the HGT file
-    with rasterio.open(input_file) as src:
-        # Read the elevation data
-        elevation = src.read(1)
+    # The NumPy array is written to a temporary file and only moved over
+    # elevation_data.npy once everything succeeded, so a failed read leaves
+    # the previous output intact
+    npy_file = 'elevation_data.npy'
+    tmp_file = npy_file + '.tmp'
+    
+    try:
+        # Open the HGT file
+        with rasterio.open(input_file) as src:
+            # Read the elevation data straight into a memory-mapped .npy file,
+            # so the saved NumPy array and the in-memory buffer share pages.
+            # Keep the source's own dtype (int16 for SRTM) for every output
+            elevation = np.lib.format.open_memmap(tmp_file, mode='w+',
+                                                  dtype=src.dtypes[0],
+                                                  shape=(src.height, src.width))
+            src.read(1, out=elevation)
+            
+            # Get the geotransform information
+            transform = src.transform
+            
+            # Create output GeoTIFF from the same buffer
+            with rasterio.open(
+                output_file,
+                'w',
+                driver='GTiff',
+                height=elevation.shape[0],
+                width=elevation.shape[1],
+                count=1,
+                dtype=elevation.dtype,
+                crs='EPSG:4326',  # WGS84
+                transform=transform,
+                nodata=-32768
+            ) as dst:
+                # Write the elevation data
+                dst.write(elevation, 1)
         
-        # Get the geotransform information
-        transform = src.transform
+        # Create visualization from the same buffer as well
+        plt.figure(figsize=(10, 8))
+        plt.imshow(elevation, cmap='terrain')
+        plt.colorbar(label='Elevation (meters)')
+        plt.title('DEM Visualization')
+        plt.savefig('dem_visualization.png', dpi=300, bbox_inches='tight')
+        plt.close()
         
-        # Create output GeoTIFF
-        with rasterio.open(
-            output_file,
-            'w',
-            driver='GTiff',
-            height=elevation.shape[0],
-            width=elevation.shape[1],
-            count=1,
-            dtype=elevation.dtype,
-            crs='EPSG:4326',  # WGS84
-            transform=transform,
-            nodata=-32768
-        ) as dst:
-            # Write the elevation data
-            dst.write(elevation, 1)
-    
-    # Save as NumPy array for direct loading
-    np.save('elevation_data.npy', elevation)
+        # Flush the NumPy array to disk and release the mapping
+        elevation.flush()
+        del elevation
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
     
-    # Create visualization
-    plt.figure(figsize=(10, 8))
-    plt.imshow(elevation, cmap='terrain')
-    plt.colorbar(label='Elevation (meters)')
-    plt.title('DEM Visualization')
-    plt.savefig('dem_visualization.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    os.replace(tmp_file, npy_file)
 
 if __name__ == "__main__":
     input_file = "N39E035.SRTMGL1.hgt/N39E035.hgt"